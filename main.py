@@ -1,6 +1,12 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, scrolledtext
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+try:
+    import orjson # Optional, decodes the large leaderboard pages much faster than the stdlib json
+except ImportError:
+    orjson = None
 import sqlite3
 import json
 from datetime import datetime
@@ -8,13 +14,59 @@ import os
 import re
 import time
 import math
+import functools
+import bisect
+import threading
+import queue
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+from collections import Counter, namedtuple
+from concurrent.futures import ThreadPoolExecutor
 
 DATABASE_NAME = 'trackmania_stats.db'
 MAP_URLS_FILE = 'maps_api_urls.txt'
 
+_RE_MAP_UID = re.compile(r'/map/([^?]+)')
+
+# --- HTTP Session ---
+# One keep-alive session for every API call, so consecutive pages reuse the same TLS connection
+SESSION = requests.Session()
+SESSION.headers.update({'User-Agent': 'TrackmaniaMapInfoAnalyzer/1.0 (+https://github.com/TheMaster1127/TrackmaniaMapInfoAnalyzer)'})
+SESSION.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=16,
+                                      max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 502, 503, 504])))
+MAX_CONCURRENT_PAGE_FETCHES = 4 # Leaderboard pages requested in parallel per map
+
 # --- Database Setup ---
+# Read-side settings, safe on a mode=ro connection
+READ_PRAGMAS = '''
+PRAGMA busy_timeout=5000;
+PRAGMA cache_size=-20000;
+PRAGMA temp_store=MEMORY;
+'''
+# WAL + synchronous=NORMAL: a commit no longer fsyncs the main DB file, and readers don't block the writer
+DB_PRAGMAS = '''
+PRAGMA journal_mode=WAL;
+PRAGMA synchronous=NORMAL;
+PRAGMA foreign_keys=ON;
+''' + READ_PRAGMAS
+
+def connect_db(read_only=False, **connect_kwargs):
+    if read_only: # With WAL, read-only connections never block (or get blocked by) the single writer
+        conn = sqlite3.connect(f"file:{DATABASE_NAME}?mode=ro", uri=True, **connect_kwargs)
+        conn.executescript(READ_PRAGMAS) # journal_mode=WAL needs a write, init_db's connection converts the file
+    else:
+        conn = sqlite3.connect(DATABASE_NAME, **connect_kwargs)
+        conn.executescript(DB_PRAGMAS)
+    return conn
+
+# Lookups run once per fetch (or once per map) on the read-only connection, rows come back as sqlite3.Row
+STORED_PLAYERS_QUERY = "SELECT player_id, last_known_name, country_name, country_flag FROM players"
+STORED_WRS_QUERY = ("SELECT m.map_uid, m.wr_player_id, m.wr_time_ms, p.last_known_name AS wr_player_name "
+                    "FROM maps m LEFT JOIN players p ON m.wr_player_id = p.player_id")
+EXISTING_RECORDS_QUERY = "SELECT player_id, time_ms, position FROM records WHERE map_uid = ?"
+NO_STORED_WR = {'wr_player_id': None, 'wr_time_ms': None, 'wr_player_name': None}
+
 def init_db():
-    conn = sqlite3.connect(DATABASE_NAME)
+    conn = connect_db()
     cursor = conn.cursor()
     cursor.execute('''
     CREATE TABLE IF NOT EXISTS maps (
@@ -41,53 +93,71 @@ def init_db():
         FOREIGN KEY (player_id) REFERENCES players (player_id)
     )
     ''')
+    # records(map_uid) lookups are already served by the (map_uid, player_id) primary key
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_maps_wr_player ON maps (wr_player_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_records_player_id ON records (player_id)") # Player profile, score aggregation
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_records_map_position ON records (map_uid, position, time_ms)") # Maps tab best times
+    # Partial indexes only hold the rows flagged by the last fetch, already in the order the tabs list them
+    cursor.execute('''CREATE INDEX IF NOT EXISTS idx_records_pb_flag ON records (script_updated_at DESC)
+                      WHERE is_pb_since_last_fetch = 1''')
+    cursor.execute('''CREATE INDEX IF NOT EXISTS idx_records_new_player_flag ON records (script_recorded_at DESC)
+                      WHERE is_new_player_on_map_since_last_fetch = 1''')
     conn.commit()
+    cursor.execute("ANALYZE") # Refresh planner statistics so the indexes get picked
     conn.close()
 
 
 def extract_map_uid_from_url(api_url):
-    match = re.search(r'/map/([^?]+)', api_url)
+    match = _RE_MAP_UID.search(api_url)
     return match.group(1) if match else None
 
+def split_api_url(api_url):
+    # Returns the URL parts plus its query params minus any offset/length, which are set per page
+    url_parts = urlsplit(api_url)
+    base_query = [(k, v) for k, v in parse_qsl(url_parts.query, keep_blank_values=True) if k not in ('offset', 'length')]
+    return url_parts, base_query
+
+def build_paginated_url(url_parts, base_query, offset, length):
+    query = urlencode(base_query + [('offset', offset), ('length', length)])
+    return urlunsplit(url_parts._replace(query=query))
+
+def fetch_leaderboard_page(paginated_api_url):
+    # Runs on the page pool threads; errors are re-raised to the caller when it reads the result
+    response = SESSION.get(paginated_api_url, timeout=30)
+    response.raise_for_status()
+    # orjson.JSONDecodeError subclasses json.JSONDecodeError, so callers handle both parsers the same way
+    return orjson.loads(response.content) if orjson else response.json()
+
 def get_actual_country_info(zone_data):
-    current_zone = zone_data
-    country_name = current_zone.get('name', 'Unknown')
-    country_flag = current_zone.get('flag', 'WOR')
-    path = []
-    temp_zone = zone_data
-    while temp_zone:
-        path.insert(0, temp_zone)
-        temp_zone = temp_zone.get('parent')
-    if len(path) > 1:
-        for i in range(len(path) - 1, -1, -1):
-            zone = path[i]
-            parent_zone = zone.get('parent')
-            if parent_zone:
-                grandparent_zone = parent_zone.get('parent')
-                if (grandparent_zone and grandparent_zone.get('name') == "World") or \
-                   (parent_zone.get('name') == "World" and zone.get('name') != "World"):
-                    country_name = zone.get('name', country_name)
-                    country_flag = zone.get('flag', country_flag)
-                    break
-            elif zone.get('name') != "World": # Case where the zone itself is a country direct child of nothing (or World removed)
-                country_name = zone.get('name', country_name)
-                country_flag = zone.get('flag', country_flag)
-                break
-    elif path and path[0].get('name') != "World": # Single zone, not "World"
-        country_name = path[0].get('name', country_name)
-        country_flag = path[0].get('flag', country_flag)
+    # Single walk up the parent chain: the country is the first zone whose grandparent (or parent) is "World"
+    country_name = zone_data.get('name', 'Unknown')
+    country_flag = zone_data.get('flag', 'WOR')
+    zone, parent_zone = zone_data, zone_data.get('parent')
+    while parent_zone:
+        grandparent_zone = parent_zone.get('parent')
+        if (grandparent_zone and grandparent_zone.get('name') == "World") or \
+           (parent_zone.get('name') == "World" and zone.get('name') != "World"):
+            return zone.get('name', country_name), zone.get('flag', country_flag)
+        zone, parent_zone = parent_zone, grandparent_zone
+    if zone and zone.get('name') != "World": # Topmost zone is itself a country (no "World" above it)
+        return zone.get('name', country_name), zone.get('flag', country_flag)
     return country_name, country_flag
 
+def get_cached_country_info(zone_data, zone_cache):
+    # Players from the same region share the result, so key it on the zone and its two nearest ancestors
+    parent_zone = zone_data.get('parent') or {}
+    zone_key = (zone_data.get('name'), zone_data.get('flag'), parent_zone.get('name'), (parent_zone.get('parent') or {}).get('name'))
+    country_info = zone_cache.get(zone_key)
+    if country_info is None:
+        country_info = zone_cache[zone_key] = get_actual_country_info(zone_data)
+    return country_info
+
+@functools.lru_cache(maxsize=8192) # Same times get formatted over and over (summary, every tab refresh)
 def format_time_ms(ms, show_millis=True, show_hours_minutes_optional=True):
     if ms is None: return "N/A"
-    total_seconds_float = ms / 1000.0
-    milliseconds_part = 0
-    if show_millis:
-        milliseconds_part = int(round((total_seconds_float - math.floor(total_seconds_float)) * 1000))
-    seconds_int = int(math.floor(total_seconds_float))
-    hours = seconds_int // 3600
-    minutes = (seconds_int % 3600) // 60
-    seconds = seconds_int % 60
+    seconds_int, milliseconds_part = divmod(int(ms), 1000) # Integer math, no float rounding
+    hours, remaining_seconds = divmod(seconds_int, 3600)
+    minutes, seconds = divmod(remaining_seconds, 60)
     time_str = ""
     if hours > 0:
         time_str += f"{hours:d}:"
@@ -105,68 +175,108 @@ def format_time_ms(ms, show_millis=True, show_hours_minutes_optional=True):
     if show_millis: time_str += f".{milliseconds_part:03d}"
     return time_str
 
-def calculate_points_for_rank(rank):
+def format_iso_timestamp_short(iso_str): # ISO 8601 timestamp -> 'YY-MM-DD HH:MM' as shown in the tabs
+    if not iso_str: return 'N/A'
+    # Stored timestamps are 'YYYY-MM-DDTHH:MM...', whose fields can be sliced out without parsing
+    if len(iso_str) >= 16 and iso_str[4] == '-' and iso_str[7] == '-' and iso_str[10] in 'T ' and iso_str[13] == ':':
+        return f"{iso_str[2:4]}-{iso_str[5:7]}-{iso_str[8:10]} {iso_str[11:16]}"
+    return datetime.fromisoformat(iso_str).strftime('%y-%m-%d %H:%M') # Any other ISO form
+
+_POWERS_OF_TEN = tuple(10**i for i in range(16))
+_TIER_BASE_POINTS = tuple(4000 / (2**(tier - 1)) for tier in range(1, 17)) # Indexed by tier - 1
+
+def _compute_points_for_rank(rank):
     if not rank or rank <= 0: return 0
-    tier = math.ceil(math.log10(rank))
-    points = 0
-    if tier < 1: tier = 1 # Should not happen if rank > 0
-    if tier < 2: # Rank 1-9
+    tier = bisect.bisect_left(_POWERS_OF_TEN, rank) # == ceil(log10(rank)), in integer math
+    if tier < 2: # Rank 1-10
         points = 40000 / rank
-    else: # Rank 10+
-        base_points = 4000 / (2**(tier - 1))
-        rank_multiplier = (10**(tier - 1)) / rank + 0.9
-        points = base_points * rank_multiplier
+    else: # Rank 11+
+        points = _TIER_BASE_POINTS[tier - 1] * (_POWERS_OF_TEN[tier - 1] / rank + 0.9)
     return round(points, 2)
 
+# Points for every rank the API can return (leaderboards stop at 10k), so scoring is a tuple index per record
+MAX_TABLED_RANK = 10000
+_POINTS_TABLE = tuple(_compute_points_for_rank(rank) for rank in range(MAX_TABLED_RANK + 1))
+
+def calculate_points_for_rank(rank):
+    if type(rank) is int and 0 <= rank <= MAX_TABLED_RANK:
+        return _POINTS_TABLE[rank]
+    return _compute_points_for_rank(rank)
+
 # --- API and Data Processing ---
-def fetch_and_process_data(log_callback):
-    if not os.path.exists(MAP_URLS_FILE):
-        log_callback(f"Error: {MAP_URLS_FILE} not found.")
-        messagebox.showerror("Error", f"{MAP_URLS_FILE} not found...")
-        return {'error': True}
+_MAP_ENTRIES_CACHE = {'mtime': None, 'entries': None, 'warnings': None}
+
+def load_map_entries(log_callback):
+    # Parsed entries (and the parse warnings, logged again on every fetch) are reused until MAP_URLS_FILE changes on disk
+    mtime = os.path.getmtime(MAP_URLS_FILE)
+    if _MAP_ENTRIES_CACHE['mtime'] == mtime:
+        for warning in _MAP_ENTRIES_CACHE['warnings']: log_callback(warning)
+        return _MAP_ENTRIES_CACHE['entries']
 
     map_url_entries = []
+    parse_warnings = []
     with open(MAP_URLS_FILE, 'r') as f:
         for line_num, line in enumerate(f):
             line = line.strip()
             if not line or line.startswith('#'): continue
             parts = line.split('|', 1)
             if len(parts) == 2:
-                map_url_entries.append({'url_template': parts[0].strip(), 'name': parts[1].strip(), 'fetch_order': line_num})
+                url_template = parts[0].strip()
+                url_parts, base_query = split_api_url(url_template)
+                map_url_entries.append({'url_template': url_template, 'name': parts[1].strip(), 'fetch_order': line_num,
+                                        'url_parts': url_parts, 'base_query': base_query})
             else:
-                log_callback(f"Warning: Skipping malformed line {line_num+1} in {MAP_URLS_FILE}: '{line}'")
+                warning = f"Warning: Skipping malformed line {line_num+1} in {MAP_URLS_FILE}: '{line}'"
+                log_callback(warning)
+                parse_warnings.append(warning)
+    _MAP_ENTRIES_CACHE['mtime'] = mtime
+    _MAP_ENTRIES_CACHE['entries'] = map_url_entries
+    _MAP_ENTRIES_CACHE['warnings'] = parse_warnings
+    return map_url_entries
+
+def fetch_and_process_data(log_callback):
+    if not os.path.exists(MAP_URLS_FILE):
+        log_callback(f"Error: {MAP_URLS_FILE} not found.")
+        return {'error': True, 'error_message': f"{MAP_URLS_FILE} not found..."}
+
+    map_url_entries = load_map_entries(log_callback)
     if not map_url_entries:
         log_callback(f"No valid map entries found in {MAP_URLS_FILE}.")
         return {'error': True}
 
-    conn = sqlite3.connect(DATABASE_NAME)
+    # One writer connection owning every INSERT/UPDATE (explicit transactions), plus a read-only one for lookups
+    conn = connect_db(isolation_level=None)
     cursor = conn.cursor()
+    read_conn = connect_db(read_only=True)
+    read_conn.row_factory = sqlite3.Row
+    read_cursor = read_conn.cursor()
+    cursor.execute("BEGIN IMMEDIATE")
     cursor.execute("UPDATE records SET is_pb_since_last_fetch = 0, is_new_player_on_map_since_last_fetch = 0")
     cursor.execute("UPDATE maps SET is_new_wr_since_last_fetch = 0")
-    conn.commit()
+    cursor.execute("COMMIT")
+
+    # player_id -> (last_known_name, country_name, country_flag), kept in sync with every players write below
+    player_cache = {row["player_id"]: (row["last_known_name"], row["country_name"], row["country_flag"])
+                    for row in read_cursor.execute(STORED_PLAYERS_QUERY)}
+    # map_uid -> row with wr_player_id, wr_time_ms, wr_player_name as stored before this fetch
+    db_wr_cache = {row["map_uid"]: row for row in read_cursor.execute(STORED_WRS_QUERY)}
 
     current_fetch_time = datetime.now().isoformat()
     session_data = {
         'newly_added_players': set(), 'new_pbs': [], 'new_players_on_map': [],
         'new_wrs': [], 'player_name_changes': []
     }
-    headers = {'User-Agent': 'TrackmaniaMapInfoAnalyzer/1.0 (+https://github.com/TheMaster1127/TrackmaniaMapInfoAnalyzer)'} 
+    seen_name_changes = set() # (player_id, new_name) pairs already in player_name_changes
+    zone_cache = {} # Zone signature -> (country_name, country_flag), shared by all maps of this fetch
 
     RECORDS_PER_PAGE = 100
+    page_pool = ThreadPoolExecutor(max_workers=MAX_CONCURRENT_PAGE_FETCHES)
 
     for entry_data in map_url_entries:
         base_api_url_template = entry_data['url_template']
         map_display_name = entry_data['name']
         fetch_order = entry_data['fetch_order']
-
-        base_api_url = base_api_url_template
-        base_api_url = re.sub(r'[?&]offset=\d+', '', base_api_url)
-        base_api_url = re.sub(r'[?&]length=\d+', '', base_api_url)
-        if base_api_url.endswith('?'):
-            base_api_url = base_api_url[:-1]
-        if base_api_url.endswith('&'):
-            base_api_url = base_api_url[:-1]
-
+        url_parts, base_query = entry_data['url_parts'], entry_data['base_query']
 
         map_uid = extract_map_uid_from_url(base_api_url_template)
         if not map_uid:
@@ -176,64 +286,71 @@ def fetch_and_process_data(log_callback):
         log_callback(f"Fetching data for map: '{map_display_name}' (UID: {map_uid})...")
 
         all_tops_for_map = []
-        current_offset = 0
         map_total_playercount_api = 0
         first_fetch_done = False
 
-        while True:
-            paginated_api_url = base_api_url
-            param_char = '&' if '?' in paginated_api_url else '?'
-            paginated_api_url += f"{param_char}offset={current_offset}&length={RECORDS_PER_PAGE}"
-            # If the first param added was offset (so paginated_api_url had no '?' initially),
-            # and now we add length, it needs to be an '&'
-            if param_char == '?' and 'length' in paginated_api_url : # Check if length got added with '?' and now needs '&'
-                 paginated_api_url = paginated_api_url.replace(f"?length={RECORDS_PER_PAGE}",f"&length={RECORDS_PER_PAGE}",1)
-
-
-            log_callback(f"  Fetching page: {paginated_api_url}")
-            try:
-                response = requests.get(paginated_api_url, headers=headers, timeout=30)
-                response.raise_for_status()
-                api_response_data = response.json()
-            except requests.exceptions.RequestException as e:
-                log_callback(f"  Error fetching page for '{map_display_name}': {e}")
-                break
-            except json.JSONDecodeError as e:
-                log_callback(f"  Error decoding JSON for page of '{map_display_name}': {e}")
-                break
-
-            current_page_tops = api_response_data.get('tops')
-
-            if not first_fetch_done:
-                map_total_playercount_api = api_response_data.get('playercount', 0)
-                cursor.execute('''
-                INSERT OR IGNORE INTO maps (map_uid, api_url, map_display_name, fetch_order, last_fetched_at, last_playercount)
-                VALUES (?, ?, ?, ?, ?, ?)
-                ''', (map_uid, base_api_url_template, map_display_name, fetch_order, current_fetch_time, map_total_playercount_api ))
-                cursor.execute('''
-                UPDATE maps SET map_display_name = ?, last_playercount = ?, last_fetched_at = ?,
-                               api_url = ?, fetch_order = ?
-                WHERE map_uid = ?
-                ''', (map_display_name, map_total_playercount_api, current_fetch_time,
-                      base_api_url_template, fetch_order, map_uid))
-                first_fetch_done = True
-
-            if current_page_tops:
-                all_tops_for_map.extend(current_page_tops)
-                if len(current_page_tops) < RECORDS_PER_PAGE:
-                    log_callback(f"  Got {len(current_page_tops)} records, less than page size. Assuming end of leaderboard for '{map_display_name}'.")
+        # The first page is fetched alone since its playercount tells us every remaining offset up front,
+        # those pages then go out in parallel waves
+        page_offsets = [0]
+        next_page = 0
+        end_of_leaderboard = False
+        while next_page < len(page_offsets) and not end_of_leaderboard:
+            wave_size = MAX_CONCURRENT_PAGE_FETCHES if first_fetch_done else 1
+            wave_offsets = page_offsets[next_page:next_page + wave_size]
+            next_page += len(wave_offsets)
+            wave_urls = [build_paginated_url(url_parts, base_query, offset, RECORDS_PER_PAGE) for offset in wave_offsets]
+            for paginated_api_url in wave_urls:
+                log_callback(f"  Fetching page: {paginated_api_url}")
+
+            wave_responses = page_pool.map(fetch_leaderboard_page, wave_urls) # Results come back in page order
+            while True:
+                try:
+                    api_response_data = next(wave_responses, None)
+                except requests.exceptions.RequestException as e:
+                    log_callback(f"  Error fetching page for '{map_display_name}': {e}")
+                    end_of_leaderboard = True
                     break
-                current_offset += RECORDS_PER_PAGE
-                if current_offset >= map_total_playercount_api and map_total_playercount_api > 0 :
-                    log_callback(f"  Fetched {current_offset} records, matching/exceeding reported playercount {map_total_playercount_api}. Assuming end.")
+                except json.JSONDecodeError as e:
+                    log_callback(f"  Error decoding JSON for page of '{map_display_name}': {e}")
+                    end_of_leaderboard = True
+                    break
+                if api_response_data is None: # Wave done
                     break
-                if current_offset >= 10000 and map_total_playercount_api == 0: # Safety break if playercount is 0 but API keeps sending data
-                    log_callback(f"  Warning: Playercount is 0 but still fetching. Safety break after 10k records for '{map_display_name}'.")
-                    break # Should not happen with correct API behavior
-            else:
-                log_callback(f"  No more 'tops' data in response for '{map_display_name}'. End of leaderboard.")
-                break
-            time.sleep(1.5) # Rate limit
+
+                current_page_tops = api_response_data.get('tops')
+
+                if not first_fetch_done:
+                    map_total_playercount_api = api_response_data.get('playercount', 0)
+                    first_fetch_done = True
+                    pages = max(1, math.ceil(map_total_playercount_api / RECORDS_PER_PAGE))
+                    page_offsets.extend(range(RECORDS_PER_PAGE, pages * RECORDS_PER_PAGE, RECORDS_PER_PAGE))
+
+                if current_page_tops:
+                    all_tops_for_map.extend(current_page_tops)
+                    if len(current_page_tops) < RECORDS_PER_PAGE:
+                        log_callback(f"  Got {len(current_page_tops)} records, less than page size. Assuming end of leaderboard for '{map_display_name}'.")
+                        end_of_leaderboard = True
+                        break
+                else:
+                    log_callback(f"  No more 'tops' data in response for '{map_display_name}'. End of leaderboard.")
+                    end_of_leaderboard = True
+                    break
+            if not end_of_leaderboard and next_page < len(page_offsets):
+                time.sleep(1.0) # Rate limit, once per wave
+
+        # All pages are in; the map's writes happen in one transaction so the write lock isn't held during HTTP calls
+        cursor.execute("BEGIN IMMEDIATE")
+        if first_fetch_done:
+            cursor.execute('''
+            INSERT OR IGNORE INTO maps (map_uid, api_url, map_display_name, fetch_order, last_fetched_at, last_playercount)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ''', (map_uid, base_api_url_template, map_display_name, fetch_order, current_fetch_time, map_total_playercount_api ))
+            cursor.execute('''
+            UPDATE maps SET map_display_name = ?, last_playercount = ?, last_fetched_at = ?,
+                           api_url = ?, fetch_order = ?
+            WHERE map_uid = ?
+            ''', (map_display_name, map_total_playercount_api, current_fetch_time,
+                  base_api_url_template, fetch_order, map_uid))
 
         actual_fetched_count = len(all_tops_for_map)
         if actual_fetched_count != map_total_playercount_api :
@@ -251,25 +368,26 @@ def fetch_and_process_data(log_callback):
             api_wr_game_timestamp = wr_entry_data.get('timestamp')
             api_wr_player_name = wr_player_data_json.get('name', 'UnknownWRPlayer')
             if api_wr_player_id:
-                wr_country_name, wr_country_flag = get_actual_country_info(wr_player_data_json.get('zone', {}))
-                cursor.execute("SELECT last_known_name FROM players WHERE player_id = ?", (api_wr_player_id,))
-                db_player_row_wr = cursor.fetchone()
-                if not db_player_row_wr:
+                wr_country_name, wr_country_flag = get_cached_country_info(wr_player_data_json.get('zone', {}), zone_cache)
+                wr_player_info = (api_wr_player_name, wr_country_name, wr_country_flag)
+                cached_wr_player = player_cache.get(api_wr_player_id)
+                # Written right away (not batched): the maps.wr_player_id update below references this row
+                if cached_wr_player is None:
                     cursor.execute("INSERT INTO players VALUES (?, ?, ?, ?, ?)",
                                    (api_wr_player_id, api_wr_player_name, wr_country_name, wr_country_flag, current_fetch_time))
                     session_data['newly_added_players'].add(api_wr_player_name)
-                elif db_player_row_wr[0] != api_wr_player_name:
-                    if not any(change[0] == api_wr_player_id and change[2] == api_wr_player_name for change in session_data['player_name_changes']):
-                        session_data['player_name_changes'].append((api_wr_player_id, db_player_row_wr[0], api_wr_player_name))
+                elif cached_wr_player != wr_player_info:
+                    if cached_wr_player[0] != api_wr_player_name:
+                        if (api_wr_player_id, api_wr_player_name) not in seen_name_changes:
+                            seen_name_changes.add((api_wr_player_id, api_wr_player_name))
+                            session_data['player_name_changes'].append((api_wr_player_id, cached_wr_player[0], api_wr_player_name))
                     cursor.execute("UPDATE players SET last_known_name=?, country_name=?, country_flag=? WHERE player_id=?",
                                    (api_wr_player_name, wr_country_name, wr_country_flag, api_wr_player_id))
-                else: # Name is same, update country info if needed
-                    cursor.execute("UPDATE players SET country_name=?, country_flag=? WHERE player_id=?",
-                                   (wr_country_name, wr_country_flag, api_wr_player_id))
+                player_cache[api_wr_player_id] = wr_player_info
 
-        cursor.execute("SELECT m.wr_player_id, m.wr_time_ms, p.last_known_name FROM maps m LEFT JOIN players p ON m.wr_player_id = p.player_id WHERE m.map_uid = ?", (map_uid,))
-        db_wr_row_map = cursor.fetchone()
-        db_wr_player_id, db_wr_time_ms_map, db_wr_player_name_map = (db_wr_row_map[0], db_wr_row_map[1], db_wr_row_map[2] if db_wr_row_map and db_wr_row_map[2] else "N/A") if db_wr_row_map else (None, None, "N/A")
+        db_wr_row = db_wr_cache.get(map_uid, NO_STORED_WR)
+        db_wr_player_id, db_wr_time_ms_map = db_wr_row["wr_player_id"], db_wr_row["wr_time_ms"]
+        db_wr_player_name_map = db_wr_row["wr_player_name"] or "N/A"
 
         wr_changed_this_fetch = False # Initialize this flag for each map
         if api_wr_player_id and api_wr_time_ms is not None:
@@ -277,45 +395,51 @@ def fetch_and_process_data(log_callback):
                 session_data['new_wrs'].append((map_display_name, api_wr_player_name, api_wr_time_ms, db_wr_player_name_map, db_wr_time_ms_map))
                 cursor.execute("UPDATE maps SET wr_player_id=?, wr_time_ms=?, wr_game_timestamp=?, wr_script_recorded_at=?, is_new_wr_since_last_fetch=1 WHERE map_uid=?",
                                (api_wr_player_id, api_wr_time_ms, api_wr_game_timestamp, current_fetch_time, map_uid))
+                db_wr_cache[map_uid] = {'wr_player_id': api_wr_player_id, 'wr_time_ms': api_wr_time_ms, 'wr_player_name': api_wr_player_name}
                 wr_changed_this_fetch = True
         elif db_wr_player_id is not None: # DB had WR, API now shows no WR
             session_data['new_wrs'].append((map_display_name, "None (Empty Leaderboard or WR Deleted)", None, db_wr_player_name_map, db_wr_time_ms_map))
             cursor.execute("UPDATE maps SET wr_player_id=NULL, wr_time_ms=NULL, wr_game_timestamp=NULL, wr_script_recorded_at=?, is_new_wr_since_last_fetch=1 WHERE map_uid=?",
                                (current_fetch_time, map_uid))
+            db_wr_cache[map_uid] = NO_STORED_WR
             wr_changed_this_fetch = True
         
         # If wr_changed_this_fetch is False, is_new_wr_since_last_fetch remains 0 (due to initial reset)
 
+        # Classify every row in Python against what's stored, then write the map with a few executemany() calls
+        existing_records = {row["player_id"]: (row["time_ms"], row["position"])
+                            for row in read_cursor.execute(EXISTING_RECORDS_QUERY, (map_uid,))}
+        players_to_upsert, new_records, pb_updates, position_updates = [], [], [], []
+
         for rank, record_entry in enumerate(all_tops_for_map, 1):
             player_data_json = record_entry.get('player', {})
             player_id = player_data_json.get('id')
             current_player_name_api = player_data_json.get('name', 'Unknown')
             if not player_id: continue # Should not happen with valid API data
-            country_name, country_flag = get_actual_country_info(player_data_json.get('zone', {}))
-            cursor.execute("SELECT last_known_name FROM players WHERE player_id = ?", (player_id,))
-            db_player_row_rec = cursor.fetchone()
-            if not db_player_row_rec:
-                cursor.execute("INSERT INTO players VALUES (?, ?, ?, ?, ?)",
-                               (player_id, current_player_name_api, country_name, country_flag, current_fetch_time))
+            country_name, country_flag = get_cached_country_info(player_data_json.get('zone', {}), zone_cache)
+            player_info = (current_player_name_api, country_name, country_flag)
+            cached_player = player_cache.get(player_id)
+            if cached_player is None:
                 session_data['newly_added_players'].add(current_player_name_api)
             else:
-                db_last_known_name = db_player_row_rec[0]
+                db_last_known_name = cached_player[0]
                 if db_last_known_name != current_player_name_api:
-                    if not any(change[0] == player_id and change[2] == current_player_name_api for change in session_data['player_name_changes']): # Avoid duplicate name change logs per session
+                    if (player_id, current_player_name_api) not in seen_name_changes: # Avoid duplicate name change logs per session
+                        seen_name_changes.add((player_id, current_player_name_api))
                         session_data['player_name_changes'].append((player_id, db_last_known_name, current_player_name_api))
-                # Always update name and country info, as it might change (name change, or better zone data)
-                cursor.execute("UPDATE players SET last_known_name=?, country_name=?, country_flag=? WHERE player_id=?",
-                               (current_player_name_api, country_name, country_flag, player_id))
+            # Name and country info might change (name change, or better zone data); only write when they did
+            if cached_player != player_info:
+                players_to_upsert.append((player_id, current_player_name_api, country_name, country_flag, current_fetch_time))
+                player_cache[player_id] = player_info
 
             time_ms_val = record_entry.get('time')
             score_val = record_entry.get('score') # Typically 0 for time attack, useful for other modes
             game_timestamp = record_entry.get('timestamp')
-            cursor.execute("SELECT time_ms, position FROM records WHERE map_uid=? AND player_id=?", (map_uid, player_id))
-            existing_record_tuple = cursor.fetchone()
+            existing_record_tuple = existing_records.get(player_id)
             if existing_record_tuple is None: # New player on this map
-                cursor.execute("INSERT INTO records VALUES (?,?,?,?,?,?,?,?,0,1)", # is_pb=0, is_new_player=1
-                               (map_uid,player_id,time_ms_val,score_val,rank,game_timestamp,current_fetch_time,current_fetch_time))
+                new_records.append((map_uid,player_id,time_ms_val,score_val,rank,game_timestamp,current_fetch_time,current_fetch_time))
                 session_data['new_players_on_map'].append((current_player_name_api, map_display_name, time_ms_val))
+                existing_records[player_id] = (time_ms_val, rank)
             else: # Existing player on this map
                 existing_time_ms, existing_pos = existing_record_tuple
                 is_pb = False
@@ -324,21 +448,34 @@ def fetch_and_process_data(log_callback):
                 elif time_ms_val is not None and existing_time_ms is not None and time_ms_val == existing_time_ms and rank < existing_pos : is_pb = True
 
                 if is_pb:
-                    cursor.execute("UPDATE records SET time_ms=?,score=?,position=?,game_timestamp=?,script_updated_at=?,is_pb_since_last_fetch=1 WHERE map_uid=? AND player_id=?",
-                                   (time_ms_val,score_val,rank,game_timestamp,current_fetch_time,map_uid,player_id))
+                    pb_updates.append((time_ms_val,score_val,rank,game_timestamp,current_fetch_time,map_uid,player_id))
                     session_data['new_pbs'].append((current_player_name_api, map_display_name, time_ms_val, existing_time_ms))
-                else: # Not a PB, but rank might have changed or just update timestamp
-                    if rank != existing_pos: # Rank changed without time improving (e.g. others improved/got deleted)
-                        cursor.execute("UPDATE records SET position=?,script_updated_at=? WHERE map_uid=? AND player_id=?",(rank,current_fetch_time,map_uid,player_id))
-                    else: # Nothing changed except our fetch time
-                        cursor.execute("UPDATE records SET script_updated_at=? WHERE map_uid=? AND player_id=?",(current_fetch_time,map_uid,player_id))
-        conn.commit()
+                    existing_records[player_id] = (time_ms_val, rank)
+                else: # Not a PB, but rank might have changed (e.g. others improved/got deleted); always bump our fetch time
+                    position_updates.append((rank,current_fetch_time,map_uid,player_id))
+                    existing_records[player_id] = (existing_time_ms, rank)
+
+        cursor.executemany('''
+        INSERT INTO players VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT(player_id) DO UPDATE SET last_known_name=excluded.last_known_name,
+                                             country_name=excluded.country_name, country_flag=excluded.country_flag
+        ''', players_to_upsert)
+        cursor.executemany("INSERT INTO records VALUES (?,?,?,?,?,?,?,?,0,1)", new_records) # is_pb=0, is_new_player=1
+        cursor.executemany("UPDATE records SET time_ms=?,score=?,position=?,game_timestamp=?,script_updated_at=?,is_pb_since_last_fetch=1 WHERE map_uid=? AND player_id=?",
+                           pb_updates)
+        cursor.executemany("UPDATE records SET position=?,script_updated_at=? WHERE map_uid=? AND player_id=?", position_updates)
+        cursor.execute("COMMIT")
         log_callback(f"Finished processing map: '{map_display_name}'. Fetched {actual_fetched_count} records.")
         time.sleep(1.5)
 
+    page_pool.shutdown()
+    conn.execute("PRAGMA optimize")
     conn.close()
+    read_conn.close()
     log_callback("Data fetching and processing complete.")
+    return session_data
 
+def build_fetch_summary(session_data):
     summary_message = "Fetch Complete!\n"
     if session_data['newly_added_players']:
         summary_message += f"\nNewly discovered players: {len(session_data['newly_added_players'])}\n  "
@@ -367,10 +504,108 @@ def fetch_and_process_data(log_callback):
             break
     if no_changes_detected:
         summary_message += "\nNo major changes detected in this fetch."
-    messagebox.showinfo("Fetch Complete", summary_message)
-    return session_data
+    return summary_message
+
+# --- GUI Refresh Queries ---
+# Run on the refresh pool's worker threads; each thread keeps its own read-only connection (WAL lets them read in parallel)
+_refresh_local = threading.local()
+_refresh_conns = [] # Every worker connection, closed by the app on exit
+
+def get_thread_read_conn():
+    conn = getattr(_refresh_local, 'conn', None)
+    if conn is None: # Autocommit, so the temp table writes never leave a read snapshot open across refreshes
+        conn = connect_db(read_only=True, check_same_thread=False, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        _refresh_local.conn = conn
+        _refresh_conns.append(conn)
+    return conn
+
+def query_all(sql, params=()):
+    return get_thread_read_conn().execute(sql, params).fetchall()
+
+PLAYER_SCORES_QUERY = '''
+    SELECT p.player_id, p.last_known_name, p.country_name,
+           COALESCE(SUM(rp.points), 0) AS score, COUNT(r.position) AS maps_played
+    FROM players p
+    LEFT JOIN records r ON r.player_id = p.player_id AND r.position IS NOT NULL
+    LEFT JOIN rank_points rp ON rp.position = r.position
+    GROUP BY p.player_id
+    ORDER BY p.rowid
+'''
+
+def query_player_scores():
+    # Points are summed per player inside SQLite by joining a temp rank -> points table, so no Python
+    # function runs per record; players without records come back with score 0 and 0 maps
+    cursor = get_thread_read_conn().cursor()
+    cursor.execute("CREATE TEMP TABLE IF NOT EXISTS rank_points (position INTEGER PRIMARY KEY, points)")
+    cursor.executemany("INSERT OR IGNORE INTO rank_points (position, points) VALUES (?, ?)",
+                       [(position, calculate_points_for_rank(position)) for (position,) in
+                        cursor.execute("SELECT DISTINCT position FROM records WHERE position IS NOT NULL").fetchall()])
+    return cursor.execute(PLAYER_SCORES_QUERY).fetchall()
+
+def query_overview_totals(): # -> (total_maps, total_players, total_records, total_playtime_ms)
+    # All four totals in one statement; the counts and the time sum can be answered from the smaller indexes
+    totals_row = get_thread_read_conn().execute('''
+        SELECT (SELECT COUNT(*) FROM maps) AS total_maps,
+               (SELECT COUNT(*) FROM players) AS total_players,
+               (SELECT COUNT(*) FROM records) AS total_records,
+               (SELECT SUM(time_ms) FROM records WHERE time_ms IS NOT NULL) AS total_time
+    ''').fetchone()
+    return totals_row['total_maps'], totals_row['total_players'], totals_row['total_records'], totals_row['total_time'] or 0
+
+# Best rank-1 record per map picked in one pass over records (window functions need SQLite 3.25+)
+MAPS_TAB_QUERY = '''
+    WITH ranked AS (
+        SELECT map_uid, player_id, time_ms,
+               ROW_NUMBER() OVER (PARTITION BY map_uid ORDER BY time_ms ASC, player_id) as rn
+        FROM records
+        WHERE position = 1 AND time_ms IS NOT NULL
+    )
+    SELECT m.map_display_name, m.map_uid, m.last_playercount,
+           r.time_ms as any_best_time, p_rec.last_known_name as any_best_player,
+           m.wr_time_ms, p_wr.last_known_name as wr_holder_name,
+           m.last_fetched_at, m.is_new_wr_since_last_fetch, m.fetch_order
+    FROM maps m
+    LEFT JOIN ranked r ON m.map_uid = r.map_uid AND r.rn = 1
+    LEFT JOIN players p_rec ON r.player_id = p_rec.player_id
+    LEFT JOIN players p_wr ON m.wr_player_id = p_wr.player_id
+    ORDER BY m.fetch_order ASC, m.map_display_name COLLATE NOCASE ASC
+'''
+
+PLAYTIME_TAB_QUERY = '''
+    SELECT
+        m.map_display_name,
+        m.map_uid,
+        SUM(CASE WHEN r.time_ms IS NOT NULL THEN r.time_ms ELSE 0 END) as total_map_playtime,
+        COUNT(DISTINCT r.player_id) as map_player_count
+    FROM maps m
+    LEFT JOIN records r ON m.map_uid = r.map_uid
+    GROUP BY m.map_uid, m.map_display_name
+    ORDER BY total_map_playtime DESC, m.map_display_name COLLATE NOCASE ASC
+'''
+
+RECENT_PBS_QUERY = '''
+    SELECT p.last_known_name, m.map_display_name, r.map_uid, r.player_id, r.time_ms, r.game_timestamp
+    FROM records r JOIN players p ON r.player_id = p.player_id JOIN maps m ON r.map_uid = m.map_uid
+    WHERE r.is_pb_since_last_fetch = 1 ORDER BY r.script_updated_at DESC
+'''
+
+NEW_PLAYERS_QUERY = '''
+    SELECT p.last_known_name, m.map_display_name, r.map_uid, r.time_ms, r.game_timestamp
+    FROM records r JOIN players p ON r.player_id = p.player_id JOIN maps m ON r.map_uid = m.map_uid
+    WHERE r.is_new_player_on_map_since_last_fetch = 1 ORDER BY r.script_recorded_at DESC
+'''
 
 # --- GUI Class TrackmaniaAnalyzerApp ---
+# One ranked player as shown across the leaderboard, search, profile and country tabs
+PlayerStanding = namedtuple('PlayerStanding', ['id', 'name', 'country', 'score', 'maps', 'global_rank'])
+
+# Row tag tuples are built once and indexed by row parity (STRIPES[row_idx & 1]), no per-row tuple or branch
+STRIPES = (('evenrow',), ('oddrow',))
+NEW_WR_STRIPES = (('new_wr_highlight', 'evenrow'), ('new_wr_highlight', 'oddrow'))
+PB_STRIPES = (('pb_highlight', 'evenrow'), ('pb_highlight', 'oddrow'))
+NEW_PLAYER_STRIPES = (('new_player_highlight', 'evenrow'), ('new_player_highlight', 'oddrow'))
+
 class TrackmaniaAnalyzerApp:
     def __init__(self, root_window):
         self.root = root_window
@@ -403,6 +638,14 @@ class TrackmaniaAnalyzerApp:
 
         self.log_text = scrolledtext.ScrolledText(main_frame, height=8, wrap=tk.WORD, bg="#1E1E1E", fg="lightgrey", font=("Consolas", 9))
         self.log_text.pack(fill=tk.X, pady=5)
+        self.log_queue = queue.Queue() # Log lines from the fetch thread, drained on the Tk thread
+
+        # Connection for the player-profile query; the tab queries run on the refresh pool's own connections
+        self.db = connect_db(check_same_thread=False, isolation_level=None)
+        self.db.execute("PRAGMA mmap_size=268435456")
+        self.db.row_factory = sqlite3.Row
+        self._refresh_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix='refresh')
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
         self.log_to_gui("Application started. Initialize DB if needed.")
         self.log_to_gui(f"Reading map list from: {os.path.abspath(MAP_URLS_FILE)}")
 
@@ -412,7 +655,9 @@ class TrackmaniaAnalyzerApp:
 
         # For Player Profile Tab
         self.player_profile_search_var = tk.StringVar()
-        self.overall_lb_sorted_players_with_rank = [] # To store player data with global rank
+        self.overall_lb_sorted_players_with_rank = [] # PlayerStanding rows, best score first
+        self.overall_lb_by_id = {} # player_id -> entry of overall_lb_sorted_players_with_rank
+        self._player_search_index = [] # (lowercased name, player data) pairs in global rank order
 
         # StringVars for selected player details
         self.selected_player_name_val = tk.StringVar(value="N/A")
@@ -440,6 +685,17 @@ class TrackmaniaAnalyzerApp:
 
 
         self.session_changes_for_gui = {} # Store session changes to highlight in GUI
+        self._sort_keys = {} # Treeview -> {iid: {column_id: raw value}} for columns whose display text doesn't sort (times)
+        self._row_extra_tags = {} # Treeview -> {iid: tags other than the striping ones}, so sorting never reads tags back from Tk
+        self._tab_queries = {} # Tab name -> future with that tab's query rows from the last refresh
+        self._dirty_tabs = set() # Tabs not yet filled since the last refresh
+        self._tab_refreshers = {
+            "Overview": self._refresh_overview_tab, "Maps": self._refresh_maps_tab,
+            "Overall Leaderboard": self._refresh_overall_leaderboard_tab, "Players": self._refresh_players_tab,
+            "Country Top Players": self._refresh_country_top_tab, "Playtime Stats": self._refresh_playtime_tab,
+            "Recent PBs": self._refresh_recent_pbs_tab, "New Players on Map": self._refresh_new_players_tab,
+        }
+        self.notebook.bind("<<NotebookTabChanged>>", self._refresh_current_tab)
         self.refresh_all_tabs()
 
     def log_to_gui(self, message):
@@ -451,12 +707,35 @@ class TrackmaniaAnalyzerApp:
     def run_fetch_and_refresh_gui(self):
         self.log_to_gui("Starting data fetch...")
         self.fetch_button.config(state=tk.DISABLED)
-        session_data_from_fetch = fetch_and_process_data(self.log_to_gui)
+        fetch_result = {}
+        def worker(): # Runs off the Tk thread; only talks back through log_queue and fetch_result
+            try:
+                fetch_result['session_data'] = fetch_and_process_data(self.log_queue.put)
+            except Exception as e:
+                self.log_queue.put(f"Data fetch failed: {e}")
+                fetch_result['session_data'] = {'error': True}
+        self.fetch_thread = threading.Thread(target=worker, daemon=True)
+        self.fetch_thread.start()
+        self.root.after(100, self.poll_fetch_worker, fetch_result)
+
+    def poll_fetch_worker(self, fetch_result):
+        worker_done = not self.fetch_thread.is_alive() # Checked before draining so no late log line gets lost
+        while True:
+            try: self.log_to_gui(self.log_queue.get_nowait())
+            except queue.Empty: break
+        if not worker_done:
+            self.root.after(100, self.poll_fetch_worker, fetch_result)
+            return
+
+        session_data_from_fetch = fetch_result['session_data']
         self.session_changes_for_gui = session_data_from_fetch # Store for highlighting PBs etc.
         if not session_data_from_fetch.get('error'):
+            messagebox.showinfo("Fetch Complete", build_fetch_summary(session_data_from_fetch))
             self.log_to_gui("Data fetch successful. Refreshing GUI.")
             self.refresh_all_tabs()
         else:
+            if session_data_from_fetch.get('error_message'):
+                messagebox.showerror("Error", session_data_from_fetch['error_message'])
             self.log_to_gui("Data fetch encountered issues or was aborted.")
         self.fetch_button.config(state=tk.NORMAL)
 
@@ -466,7 +745,7 @@ class TrackmaniaAnalyzerApp:
 
         # Columns_config_list_with_hash already includes '#' as first item
         actual_columns_config = [("#", "#", 40)] + columns_config_list_with_hash # Prepend # for display index
-        column_identifiers = [config_tuple[0] for config_tuple in actual_columns_config]
+        column_identifiers = tuple(config_tuple[0] for config_tuple in actual_columns_config)
 
         tv_params = {'columns': column_identifiers, 'show': 'headings'}
         if height: # For treeviews with a fixed number of rows visible
@@ -489,46 +768,41 @@ class TrackmaniaAnalyzerApp:
 
         return tv
 
+    def clear_treeview(self, tv):
+        tv.delete(*tv.get_children()) # One Tcl call for the whole tree
+        self._sort_keys.pop(tv, None)
+        self._row_extra_tags.pop(tv, None)
+
     def treeview_sort_column(self, tv, col, reverse):
         try:
+            row_sort_keys = self._sort_keys.get(tv, {})
+            row_extra_tags = self._row_extra_tags.get(tv, {})
             l = []
             for k in tv.get_children(''):
+                if col in row_sort_keys.get(k, ()): # Raw numeric value stored at insert time (formatted times)
+                    num_val = row_sort_keys[k][col]
+                    if num_val is None:
+                        num_val = float('-inf') if reverse else float('inf') # Sort N/A to bottom
+                    l.append((num_val, k))
+                    continue
                 val_str = str(tv.set(k, col)) # Get value as string first
                 try:
-                    # Attempt to convert to a numerical value for sorting times, scores, ranks
-                    if ':' in val_str and '.' in val_str : # Likely time formatted as M:S.ms or H:M:S.ms
-                        parts = val_str.replace('.',':').split(':') # Split by both . and :
-                        num_val = 0
-                        if len(parts) == 4: # H:M:S:MS
-                            num_val = int(parts[0])*3600000 + int(parts[1])*60000 + int(parts[2])*1000 + int(parts[3])
-                        elif len(parts) == 3: # M:S:MS or S:MS if minutes < 10
-                            # Heuristic: if first part is small, it's minutes or seconds
-                            if val_str.count(':') == 2 and val_str.index(':') < 3: # M:S.MS like 1:23.456 or 00:12:34.567
-                                num_val = int(parts[0])*60000 + int(parts[1])*1000 + int(parts[2])
-                            else: # S.MS like 23.456 (parts[0]=23, parts[1]=456 from split logic) or maybe 00:00:23.456
-                                num_val = int(parts[0])*1000 + int(parts[1]) # Assuming S.MS if not a full H:M:S or M:S.ms
-                        elif len(parts) == 2: # S.MS
-                            num_val = int(parts[0])*1000 + int(parts[1])
-                        else: # Fallback if parsing is tricky
-                             num_val = float(val_str.replace(":", "").replace(".","")) # Fallback
-                    elif val_str == "N/A":
+                    # Attempt to convert to a numerical value for sorting ranks, scores, counts
+                    if val_str == "N/A":
                         num_val = float('-inf') if reverse else float('inf') # Sort N/A to bottom/top
                     else:
-                        num_val = float(val_str) # Try direct float conversion for ranks, scores, etc.
+                        num_val = float(val_str)
                     l.append((num_val, k))
                 except ValueError: # If not easily converted to number, sort as string
                     l.append((val_str.lower(), k)) # Fallback to string sort
 
             l.sort(key=lambda t: t[0], reverse=reverse)
 
-            # Reorder items in the treeview and re-apply even/odd row tags
+            # Reorder all items in the treeview with one call, then re-apply even/odd row tags
+            tv.set_children('', *[k for val, k in l])
             for index, (val, k) in enumerate(l):
-                tv.move(k, '', index)
-                # Manage tags for striping, keeping other tags if any
-                tags = list(tv.item(k, 'tags'))
-                tags = [t for t in tags if t not in ('evenrow', 'oddrow')] # Remove old striping
-                tags.append('evenrow' if index % 2 == 0 else 'oddrow') # Add new striping
-                tv.item(k, tags=tuple(tags))
+                # New striping after the row's other tags, if any
+                tv.item(k, tags=row_extra_tags.get(k, ()) + STRIPES[index & 1])
 
             # Update the heading command to sort in the opposite direction next time
             tv.heading(col, command=lambda _col=col, _tv=tv: self.treeview_sort_column(_tv, _col, not reverse))
@@ -638,7 +912,7 @@ class TrackmaniaAnalyzerApp:
     def _clear_player_profile_fields(self):
         self.player_profile_search_var.set("")
         if hasattr(self, 'player_search_results_tv'):
-            for i in self.player_search_results_tv.get_children(): self.player_search_results_tv.delete(i)
+            self.clear_treeview(self.player_search_results_tv)
         
         self.selected_player_name_val.set("N/A")
         self.selected_player_country_val.set("N/A")
@@ -648,20 +922,20 @@ class TrackmaniaAnalyzerApp:
 
 
         if hasattr(self, 'selected_player_records_tv'):
-            for i in self.selected_player_records_tv.get_children(): self.selected_player_records_tv.delete(i)
+            self.clear_treeview(self.selected_player_records_tv)
 
 
     def perform_player_profile_search(self, event=None): # event=None for button click
         query = self.player_profile_search_var.get().lower().strip()
         
         # Clear previous results and details
-        for i in self.player_search_results_tv.get_children(): self.player_search_results_tv.delete(i)
+        self.clear_treeview(self.player_search_results_tv)
         self.selected_player_name_val.set("N/A") # Reset displayed details
         self.selected_player_country_val.set("N/A")
         self.selected_player_score_val.set("N/A")
         self.selected_player_global_rank_val.set("N/A")
         self.selected_player_maps_played_val.set("N/A")
-        for i in self.selected_player_records_tv.get_children(): self.selected_player_records_tv.delete(i)
+        self.clear_treeview(self.selected_player_records_tv)
 
         if not query:
             self.log_to_gui("Player search query is empty.")
@@ -670,19 +944,19 @@ class TrackmaniaAnalyzerApp:
         self.log_to_gui(f"Searching for player: '{query}'")
         
         matches_found = 0
-        # self.overall_lb_sorted_players_with_rank is already sorted by score
-        for idx, p_data in enumerate(self.overall_lb_sorted_players_with_rank):
-            if query in p_data['name'].lower():
-                tags = ('evenrow',) if matches_found % 2 == 0 else ('oddrow',)
-                self.player_search_results_tv.insert("", "end", iid=p_data['id'], values=( # Using player_id as iid
-                    matches_found + 1, # Display index for search results
-                    p_data['name'], 
-                    p_data['country'] if p_data['country'] else "Unknown",
-                    p_data['score'], 
-                    p_data['global_rank'], # Global rank from precomputed list
-                    p_data['maps']
-                ), tags=tags)
-                matches_found +=1
+        # self._player_search_index follows self.overall_lb_sorted_players_with_rank, already sorted by score
+        matching_players = [p_data for lowered_name, p_data in self._player_search_index if query in lowered_name]
+        for p_data in matching_players:
+            tags = STRIPES[matches_found & 1]
+            self.player_search_results_tv.insert("", "end", iid=p_data.id, values=( # Using player_id as iid
+                matches_found + 1, # Display index for search results
+                p_data.name, 
+                p_data.country if p_data.country else "Unknown",
+                p_data.score, 
+                p_data.global_rank, # Global rank from precomputed list
+                p_data.maps
+            ), tags=tags)
+            matches_found +=1
         self.log_to_gui(f"Found {matches_found} players matching '{query}'.")
 
 
@@ -696,26 +970,24 @@ class TrackmaniaAnalyzerApp:
 
     def update_player_profile_display(self, player_id):
         # Find the full player data using player_id from the precomputed list
-        player_data = next((p for p in self.overall_lb_sorted_players_with_rank if p['id'] == player_id), None)
+        player_data = self.overall_lb_by_id.get(player_id)
 
         if not player_data:
             self.log_to_gui(f"Could not find data for player ID: {player_id}")
             return
 
-        self.selected_player_name_val.set(player_data['name'])
-        self.selected_player_country_val.set(player_data['country'] if player_data['country'] else "Unknown")
-        self.selected_player_score_val.set(str(player_data['score']))
-        self.selected_player_global_rank_val.set(str(player_data['global_rank']))
-        self.selected_player_maps_played_val.set(str(player_data['maps']))
+        self.selected_player_name_val.set(player_data.name)
+        self.selected_player_country_val.set(player_data.country if player_data.country else "Unknown")
+        self.selected_player_score_val.set(str(player_data.score))
+        self.selected_player_global_rank_val.set(str(player_data.global_rank))
+        self.selected_player_maps_played_val.set(str(player_data.maps))
 
 
         # Clear old records
-        for i in self.selected_player_records_tv.get_children(): self.selected_player_records_tv.delete(i)
+        self.clear_treeview(self.selected_player_records_tv)
 
         # Fetch and display map records for this player
-        conn = sqlite3.connect(DATABASE_NAME)
-        conn.row_factory = sqlite3.Row # Access columns by name
-        cursor = conn.cursor()
+        cursor = self.db.cursor()
         cursor.execute('''
             SELECT m.map_display_name, m.map_uid, r.position, r.time_ms, r.score, r.game_timestamp
             FROM records r
@@ -724,19 +996,20 @@ class TrackmaniaAnalyzerApp:
             ORDER BY m.map_display_name COLLATE NOCASE ASC 
         ''', (player_id,))
         
-        for row_idx, record_row in enumerate(cursor.fetchall()):
-            tags = ('evenrow',) if row_idx % 2 == 0 else ('oddrow',)
-            self.selected_player_records_tv.insert("", "end", values=(
+        records_sort_keys = self._sort_keys.setdefault(self.selected_player_records_tv, {})
+        for row_idx, record_row in enumerate(cursor):
+            tags = STRIPES[row_idx & 1]
+            iid = self.selected_player_records_tv.insert("", "end", values=(
                 row_idx + 1, # Display index
                 record_row['map_display_name'] if record_row['map_display_name'] else record_row['map_uid'],
                 record_row['position'] if record_row['position'] is not None else "N/A",
                 format_time_ms(record_row['time_ms']),
                 record_row['score'] if record_row['score'] is not None else "N/A", # Score here is API score, not calculated points
-                datetime.fromisoformat(record_row['game_timestamp']).strftime('%y-%m-%d %H:%M') if record_row['game_timestamp'] else 'N/A'
+                format_iso_timestamp_short(record_row['game_timestamp'])
             ), tags=tags)
+            records_sort_keys[iid] = {'time': record_row['time_ms']}
         
-        conn.close()
-        self.log_to_gui(f"Displayed profile for {player_data['name']} (ID: {player_id}).")
+        self.log_to_gui(f"Displayed profile for {player_data.name} (ID: {player_id}).")
 
 
     def refresh_all_tabs(self):
@@ -744,216 +1017,166 @@ class TrackmaniaAnalyzerApp:
         if hasattr(self, '_clear_player_profile_fields'): 
             self._clear_player_profile_fields() # Clear player profile search and details
 
-        conn = sqlite3.connect(DATABASE_NAME)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
+        # Every tab's query runs on the refresh pool's read-only connections; only the Tk inserts happen on this thread
+        scores_future = self._refresh_pool.submit(query_player_scores)
+        self._tab_queries = {
+            "Overview": self._refresh_pool.submit(query_overview_totals),
+            "Maps": self._refresh_pool.submit(query_all, MAPS_TAB_QUERY),
+            "Playtime Stats": self._refresh_pool.submit(query_all, PLAYTIME_TAB_QUERY),
+            "Recent PBs": self._refresh_pool.submit(query_all, RECENT_PBS_QUERY),
+            "New Players on Map": self._refresh_pool.submit(query_all, NEW_PLAYERS_QUERY),
+        }
 
         # --- Precompute Player Scores and Ranks (used by multiple tabs) ---
-        all_players_data_with_scores = []
-        cursor.execute("SELECT player_id, last_known_name, country_name, first_seen_by_script_at FROM players")
-        player_rows = cursor.fetchall()
-
-        # Fetch all records once to avoid N+1 queries for scores
-        all_records_map = {} # player_id -> list of positions
-        cursor.execute("SELECT player_id, position FROM records WHERE position IS NOT NULL")
-        for rec in cursor.fetchall():
-            if rec['player_id'] not in all_records_map:
-                all_records_map[rec['player_id']] = []
-            all_records_map[rec['player_id']].append(rec['position'])
-
-        for p_row in player_rows:
-            player_id = p_row['player_id']
-            overall_score = 0
-            maps_played_count = 0
-            if player_id in all_records_map:
-                for position in all_records_map[player_id]:
-                    overall_score += calculate_points_for_rank(position)
-                maps_played_count = len(all_records_map[player_id])
-
-            all_players_data_with_scores.append({
-                'id': player_id, 'name': p_row['last_known_name'], 'country': p_row['country_name'],
-                'score': round(overall_score, 2), 'maps': maps_played_count
-            })
+        all_players_data_with_scores = [
+            (p_row['player_id'], p_row['last_known_name'], p_row['country_name'], round(p_row['score'], 2), p_row['maps_played'])
+            for p_row in scores_future.result()]
 
         # Sort all players by score for global ranking, then store with rank
-        self.overall_lb_sorted_players_with_rank = []
-        temp_sorted_for_rank = sorted(all_players_data_with_scores, key=lambda x: x['score'], reverse=True)
-        for rank_idx, p_data in enumerate(temp_sorted_for_rank):
-            player_info_with_rank = p_data.copy() 
-            player_info_with_rank['global_rank'] = rank_idx + 1
-            self.overall_lb_sorted_players_with_rank.append(player_info_with_rank)
+        all_players_data_with_scores.sort(key=lambda x: x[3], reverse=True)
+        self.overall_lb_sorted_players_with_rank = [PlayerStanding(*p_fields, global_rank=rank_idx + 1)
+                                                    for rank_idx, p_fields in enumerate(all_players_data_with_scores)]
+        self.overall_lb_by_id = {p_data.id: p_data for p_data in self.overall_lb_sorted_players_with_rank}
+        # Names are lowercased once per refresh instead of on every search
+        self._player_search_index = [((p_data.name or '').lower(), p_data) for p_data in self.overall_lb_sorted_players_with_rank]
+
+        # Only the visible tab is filled now, the others are filled the first time they're selected
+        self._dirty_tabs = set(self.tabs)
+        self._refresh_current_tab()
+        self.log_to_gui("GUI tabs refreshed.")
 
+    def _refresh_current_tab(self, event=None):
+        current_tab_name = self.notebook.tab(self.notebook.select(), 'text')
+        if current_tab_name in self._dirty_tabs:
+            self._dirty_tabs.discard(current_tab_name)
+            self._tab_refreshers[current_tab_name]()
 
-        # --- Overview Tab ---
+    def _refresh_overview_tab(self):
         tv_overview = self.tabs["Overview"]
-        for i in tv_overview.get_children(): tv_overview.delete(i)
-        cursor.execute("SELECT COUNT(*) as count FROM maps")
-        total_maps = cursor.fetchone()['count']
-        cursor.execute("SELECT COUNT(*) as count FROM players")
-        total_players = cursor.fetchone()['count']
-        cursor.execute("SELECT COUNT(*) as count FROM records")
-        total_records = cursor.fetchone()['count']
-        cursor.execute("SELECT SUM(r.time_ms) as total_time FROM records r WHERE r.time_ms IS NOT NULL") # Sum of all player times
-        total_playtime_ms_row = cursor.fetchone()
-        total_playtime_ms = total_playtime_ms_row['total_time'] if total_playtime_ms_row and total_playtime_ms_row['total_time'] else 0
+        self.clear_treeview(tv_overview)
+        total_maps, total_players, total_records, total_playtime_ms = self._tab_queries["Overview"].result()
         overview_data_list = [
             ("Total Maps Tracked", total_maps), ("Total Unique Players Seen", total_players),
             ("Total Records Stored", total_records),
             ("Grand Total Playtime (Sum of all record times)", format_time_ms(total_playtime_ms, show_millis=False) if total_playtime_ms else "N/A")
         ]
+        tv_insert = tv_overview.insert
         for row_idx, (metric, value) in enumerate(overview_data_list):
-            tags = ('evenrow',) if row_idx % 2 == 0 else ('oddrow',)
-            tv_overview.insert("", "end", values=(row_idx + 1, metric, value), tags=tags)
+            tv_insert("", "end", values=(row_idx + 1, metric, value), tags=STRIPES[row_idx & 1])
 
-
-        # --- Maps Tab ---
+    def _refresh_maps_tab(self):
         tv_maps = self.tabs["Maps"]
-        for i in tv_maps.get_children(): tv_maps.delete(i)
-        cursor.execute('''
-            SELECT m.map_display_name, m.map_uid, m.last_playercount,
-                   r.time_ms as any_best_time, p_rec.last_known_name as any_best_player,
-                   m.wr_time_ms, p_wr.last_known_name as wr_holder_name,
-                   m.last_fetched_at, m.is_new_wr_since_last_fetch, m.fetch_order
-            FROM maps m
-            LEFT JOIN (
-                SELECT map_uid, MIN(time_ms) as min_time 
-                FROM records 
-                WHERE position = 1 GROUP BY map_uid
-            ) as min_r ON m.map_uid = min_r.map_uid
-            LEFT JOIN records r ON m.map_uid = r.map_uid AND r.time_ms = min_r.min_time AND r.position = 1
-            LEFT JOIN players p_rec ON r.player_id = p_rec.player_id
-            LEFT JOIN players p_wr ON m.wr_player_id = p_wr.player_id
-            ORDER BY m.fetch_order ASC, m.map_display_name COLLATE NOCASE ASC
-        ''')
-        for row_idx, row_data in enumerate(cursor.fetchall()):
-            tags = ('new_wr_highlight',) if row_data['is_new_wr_since_last_fetch'] == 1 else ()
-            # Add striping tag after conditional highlight tag
-            tags += ('evenrow',) if row_idx % 2 == 0 else ('oddrow',)
-            
-            tv_maps.insert("", "end", values=(
-                row_idx + 1, row_data['map_display_name'] if row_data['map_display_name'] else row_data['map_uid'],
-                row_data['map_uid'], row_data['last_playercount'] if row_data['last_playercount'] is not None else '0',
-                format_time_ms(row_data['any_best_time']), row_data['any_best_player'] if row_data['any_best_player'] is not None else 'N/A',
-                format_time_ms(row_data['wr_time_ms']), row_data['wr_holder_name'] if row_data['wr_holder_name'] is not None else 'N/A',
-                datetime.fromisoformat(row_data['last_fetched_at']).strftime('%y-%m-%d %H:%M') if row_data['last_fetched_at'] else 'N/A'
-            ), tags=tags)
-
+        self.clear_treeview(tv_maps)
+        maps_sort_keys = self._sort_keys.setdefault(tv_maps, {})
+        maps_extra_tags = self._row_extra_tags.setdefault(tv_maps, {})
+        maps_rows = self._tab_queries["Maps"].result()
+        # Display values for every row are built in one pass, the insert loop below only hands them to Tk
+        maps_values = [(
+            row_idx + 1, row_data['map_display_name'] if row_data['map_display_name'] else row_data['map_uid'],
+            row_data['map_uid'], row_data['last_playercount'] if row_data['last_playercount'] is not None else '0',
+            format_time_ms(row_data['any_best_time']), row_data['any_best_player'] if row_data['any_best_player'] is not None else 'N/A',
+            format_time_ms(row_data['wr_time_ms']), row_data['wr_holder_name'] if row_data['wr_holder_name'] is not None else 'N/A',
+            format_iso_timestamp_short(row_data['last_fetched_at'])
+        ) for row_idx, row_data in enumerate(maps_rows)]
+        tv_insert = tv_maps.insert
+        for row_idx, (row_data, values) in enumerate(zip(maps_rows, maps_values)):
+            if row_data['is_new_wr_since_last_fetch'] == 1: # Highlight tag goes before the striping tag
+                tags = NEW_WR_STRIPES[row_idx & 1]
+            else:
+                tags = STRIPES[row_idx & 1]
+            iid = tv_insert("", "end", values=values, tags=tags)
+            maps_sort_keys[iid] = {'best_time': row_data['any_best_time'], 'wr_time': row_data['wr_time_ms']}
+            if row_data['is_new_wr_since_last_fetch'] == 1:
+                maps_extra_tags[iid] = ('new_wr_highlight',)
 
-        # --- Overall Leaderboard Tab ---
+    def _refresh_overall_leaderboard_tab(self):
         tv_overall_lb = self.tabs["Overall Leaderboard"]
-        for i in tv_overall_lb.get_children(): tv_overall_lb.delete(i)
-        # Use self.overall_lb_sorted_players_with_rank which is already sorted and has rank
-        for p_data in self.overall_lb_sorted_players_with_rank:
-            # global_rank starts at 1, so use (p_data['global_rank'] - 1) for 0-based indexing for striping
-            tags = ('evenrow',) if (p_data['global_rank'] -1) % 2 == 0 else ('oddrow',) 
-            tv_overall_lb.insert("", "end", values=(
-                p_data['global_rank'], # Display rank as first column
-                p_data['name'], p_data['score'], p_data['maps'], p_data['country'] if p_data['country'] else "Unknown"
-            ), tags=tags)
-
-        # --- Players Tab --- (Shows all players, ranked)
+        self.clear_treeview(tv_overall_lb)
+        # Use self.overall_lb_sorted_players_with_rank which is already sorted and has rank (first column)
+        overall_lb_values = [(p_data.global_rank, p_data.name, p_data.score, p_data.maps, p_data.country or "Unknown")
+                             for p_data in self.overall_lb_sorted_players_with_rank]
+        tv_insert = tv_overall_lb.insert
+        for row_idx, values in enumerate(overall_lb_values):
+            tv_insert("", "end", values=values, tags=STRIPES[row_idx & 1])
+
+    def _refresh_players_tab(self):
+        # Shows all players, ranked
         tv_players_tab = self.tabs["Players"]
-        for i in tv_players_tab.get_children(): tv_players_tab.delete(i)
-        for p_data in self.overall_lb_sorted_players_with_rank: # Already sorted by score
-            tags = ('evenrow',) if (p_data['global_rank'] -1) % 2 == 0 else ('oddrow',)
-            tv_players_tab.insert("", "end", values=(
-                p_data['global_rank'], # Display rank as first column
-                p_data['name'], p_data['score'],
-                p_data['country'] if p_data['country'] else "Unknown",
-                p_data['maps'],
-                p_data['id']
-            ), tags=tags)
-
-        # --- Country Top Players Tab ---
+        self.clear_treeview(tv_players_tab)
+        players_tab_values = [(p_data.global_rank, p_data.name, p_data.score, p_data.country or "Unknown", p_data.maps, p_data.id)
+                              for p_data in self.overall_lb_sorted_players_with_rank] # Already sorted by score
+        tv_insert = tv_players_tab.insert
+        for row_idx, values in enumerate(players_tab_values):
+            tv_insert("", "end", values=values, tags=STRIPES[row_idx & 1])
+
+    def _refresh_country_top_tab(self):
         tv_country_top = self.tabs["Country Top Players"]
-        for i in tv_country_top.get_children(): tv_country_top.delete(i)
-        
-        country_player_counts = {}
-        for p_data_count in self.overall_lb_sorted_players_with_rank: # This list has all players
-            country_for_count = p_data_count['country'] if p_data_count['country'] else "Unknown"
-            country_player_counts[country_for_count] = country_player_counts.get(country_for_count, 0) + 1
-
-        country_top_player_list_detailed = []
-        temp_country_best_players = {} # country -> player_data (including global_rank and num_players_in_country)
-        
-        for p_data_top in self.overall_lb_sorted_players_with_rank: # Iterates by global rank
-            country = p_data_top['country'] if p_data_top['country'] else "Unknown"
-            if country == "Unknown": continue # Skip "Unknown" country for this list
-
-            if country not in temp_country_best_players:
-                player_info_for_country_top = p_data_top.copy()
-                player_info_for_country_top['num_players_in_country'] = country_player_counts.get(country, 0)
-                temp_country_best_players[country] = player_info_for_country_top
+        self.clear_treeview(tv_country_top)
         
-        country_top_player_list_detailed = list(temp_country_best_players.values())
-        # Sort by Global Rank
-        country_top_player_list_detailed.sort(key=lambda x: x['global_rank'])
-
-
-        for display_row_idx, item_data in enumerate(country_top_player_list_detailed):
-            tags = ('evenrow',) if display_row_idx % 2 == 0 else ('oddrow',)
-            tv_country_top.insert("", "end", values=(
+        country_player_counts = Counter(p_data.country or "Unknown" for p_data in self.overall_lb_sorted_players_with_rank)
+
+        # The list is in global rank order, so the first player stored per country is its top player
+        temp_country_best_players = {} # country -> PlayerStanding
+        for p_data_top in self.overall_lb_sorted_players_with_rank:
+            country = p_data_top.country or "Unknown"
+            if country != "Unknown": # Skip "Unknown" country for this list
+                temp_country_best_players.setdefault(country, p_data_top)
+
+        # Already ordered by global rank (dicts keep insertion order)
+        country_top_player_list_detailed = [(p_data_top, country_player_counts[country])
+                                            for country, p_data_top in temp_country_best_players.items()]
+
+        tv_insert = tv_country_top.insert
+        for display_row_idx, (item_data, num_players_in_country) in enumerate(country_top_player_list_detailed):
+            tv_insert("", "end", values=(
                 display_row_idx + 1, # Display index
-                item_data['country'], 
-                item_data['global_rank'], # Global rank of this country's top player
-                item_data['name'], 
-                item_data['score'],
-                item_data['num_players_in_country'] # New column data
-            ), tags=tags)
-
-
-        # --- Playtime Stats Tab ---
+                item_data.country, 
+                item_data.global_rank, # Global rank of this country's top player
+                item_data.name, 
+                item_data.score,
+                num_players_in_country # New column data
+            ), tags=STRIPES[display_row_idx & 1])
+
+    def _refresh_playtime_tab(self):
         tv_playtime = self.tabs["Playtime Stats"]
-        for i in tv_playtime.get_children(): tv_playtime.delete(i)
-        cursor.execute('''
-            SELECT
-                m.map_display_name,
-                m.map_uid,
-                SUM(CASE WHEN r.time_ms IS NOT NULL THEN r.time_ms ELSE 0 END) as total_map_playtime,
-                COUNT(DISTINCT r.player_id) as map_player_count
-            FROM maps m
-            LEFT JOIN records r ON m.map_uid = r.map_uid
-            GROUP BY m.map_uid, m.map_display_name
-            ORDER BY total_map_playtime DESC, m.map_display_name COLLATE NOCASE ASC
-        ''')
-        for row_idx, row_data in enumerate(cursor.fetchall()):
-            tags = ('evenrow',) if row_idx % 2 == 0 else ('oddrow',)
-            playtime_val = row_data['total_map_playtime']
-            player_count_val = row_data['map_player_count']
-            tv_playtime.insert("", "end", values=(
-                row_idx + 1,
-                row_data['map_display_name'] if row_data['map_display_name'] else row_data['map_uid'],
-                format_time_ms(playtime_val, show_millis=False) if playtime_val > 0 else "0s" if playtime_val == 0 else "N/A", # Handle 0 explicitly
-                player_count_val if player_count_val > 0 else "0"
-            ), tags=tags)
-
-
-        # --- Recent PBs Tab ---
+        self.clear_treeview(tv_playtime)
+        playtime_sort_keys = self._sort_keys.setdefault(tv_playtime, {})
+        playtime_rows = self._tab_queries["Playtime Stats"].result()
+        playtime_values = [(
+            row_idx + 1,
+            row_data['map_display_name'] if row_data['map_display_name'] else row_data['map_uid'],
+            format_time_ms(row_data['total_map_playtime'], show_millis=False) if row_data['total_map_playtime'] > 0
+            else "0s" if row_data['total_map_playtime'] == 0 else "N/A", # Handle 0 explicitly
+            row_data['map_player_count'] if row_data['map_player_count'] > 0 else "0"
+        ) for row_idx, row_data in enumerate(playtime_rows)]
+        tv_insert = tv_playtime.insert
+        for row_idx, (row_data, values) in enumerate(zip(playtime_rows, playtime_values)):
+            iid = tv_insert("", "end", values=values, tags=STRIPES[row_idx & 1])
+            playtime_sort_keys[iid] = {'total_playtime': row_data['total_map_playtime']}
+
+    def _refresh_recent_pbs_tab(self):
         tv_pbs = self.tabs["Recent PBs"]
-        for i in tv_pbs.get_children(): tv_pbs.delete(i)
-        # Fetch PBs marked in DB
-        cursor.execute('''
-            SELECT p.last_known_name, m.map_display_name, r.map_uid, r.player_id, r.time_ms, r.game_timestamp
-            FROM records r JOIN players p ON r.player_id = p.player_id JOIN maps m ON r.map_uid = m.map_uid
-            WHERE r.is_pb_since_last_fetch = 1 ORDER BY r.script_updated_at DESC
-        ''')
-        pb_rows_from_db = cursor.fetchall()
+        self.clear_treeview(tv_pbs)
         new_pbs_session_list = self.session_changes_for_gui.get('new_pbs', []) if self.session_changes_for_gui else []
-
-        for row_idx, row_data in enumerate(pb_rows_from_db):
+        pbs_sort_keys = self._sort_keys.setdefault(tv_pbs, {})
+        pbs_extra_tags = self._row_extra_tags.setdefault(tv_pbs, {})
+        # Session data: (player_name, map_name, new_time_ms, old_time_ms), indexed once by its first three fields
+        session_pb_index = {}
+        for pb in new_pbs_session_list:
+            session_pb_index.setdefault((pb[0], pb[1], pb[2]), pb) # First match wins, as with the old linear scan
+
+        tv_insert = tv_pbs.insert
+        for row_idx, row_data in enumerate(self._tab_queries["Recent PBs"].result()):
             player_name_db = row_data['last_known_name']
             map_name_val = row_data['map_display_name'] if row_data['map_display_name'] else row_data['map_uid']
             new_time_ms = row_data['time_ms']
             
             old_time_display = "N/A"
             improvement_display = "N/A"
+            old_time_ms_session, improvement_ms = None, None
             
             # Try to find the matching PB in session data to get old time
-            # Session data: (player_name, map_name, new_time_ms, old_time_ms)
-            matched_pb_session = next((pb for pb in new_pbs_session_list 
-                                       if pb[0] == player_name_db and 
-                                          pb[1] == map_name_val and 
-                                          pb[2] == new_time_ms), None)
+            matched_pb_session = session_pb_index.get((player_name_db, map_name_val, new_time_ms))
             if matched_pb_session:
                 old_time_ms_session = matched_pb_session[3]
                 old_time_display = format_time_ms(old_time_ms_session) if old_time_ms_session is not None else "N/A (First Time)"
@@ -961,37 +1184,45 @@ class TrackmaniaAnalyzerApp:
                     improvement_ms = old_time_ms_session - new_time_ms
                     improvement_display = format_time_ms(improvement_ms)
             
-            tags = ['pb_highlight'] # Start with highlight tag
-            tags.append('evenrow' if row_idx % 2 == 0 else 'oddrow') # Add striping tag
-            
-            tv_pbs.insert("", "end", values=(
+            iid = tv_insert("", "end", values=(
                 row_idx + 1, player_name_db, map_name_val, format_time_ms(new_time_ms),
                 old_time_display, improvement_display,
-                datetime.fromisoformat(row_data['game_timestamp']).strftime('%y-%m-%d %H:%M') if row_data['game_timestamp'] else 'N/A'
-            ), tags=tuple(tags)) # Convert list to tuple for tags
+                format_iso_timestamp_short(row_data['game_timestamp'])
+            ), tags=PB_STRIPES[row_idx & 1])
+            pbs_sort_keys[iid] = {'new_time': new_time_ms, 'old_time': old_time_ms_session, 'improvement': improvement_ms}
+            pbs_extra_tags[iid] = ('pb_highlight',)
 
-
-        # --- New Players on Map Tab ---
+    def _refresh_new_players_tab(self):
         tv_new_players = self.tabs["New Players on Map"]
-        for i in tv_new_players.get_children(): tv_new_players.delete(i)
-        cursor.execute('''
-            SELECT p.last_known_name, m.map_display_name, r.map_uid, r.time_ms, r.game_timestamp
-            FROM records r JOIN players p ON r.player_id = p.player_id JOIN maps m ON r.map_uid = m.map_uid
-            WHERE r.is_new_player_on_map_since_last_fetch = 1 ORDER BY r.script_recorded_at DESC
-        ''')
-        for row_idx, row_data in enumerate(cursor.fetchall()):
-            tags = ['new_player_highlight'] # Start with highlight tag
-            tags.append('evenrow' if row_idx % 2 == 0 else 'oddrow') # Add striping tag
-
-            tv_new_players.insert("", "end", values=(
-                row_idx + 1, row_data['last_known_name'],
-                row_data['map_display_name'] if row_data['map_display_name'] else row_data['map_uid'],
-                format_time_ms(row_data['time_ms']),
-                datetime.fromisoformat(row_data['game_timestamp']).strftime('%y-%m-%d %H:%M') if row_data['game_timestamp'] else 'N/A'
-            ), tags=tuple(tags))
-
-        conn.close()
-        self.log_to_gui("GUI tabs refreshed.")
+        self.clear_treeview(tv_new_players)
+        new_players_sort_keys = self._sort_keys.setdefault(tv_new_players, {})
+        new_players_extra_tags = self._row_extra_tags.setdefault(tv_new_players, {})
+        new_players_rows = self._tab_queries["New Players on Map"].result()
+        new_players_values = [(
+            row_idx + 1, row_data['last_known_name'],
+            row_data['map_display_name'] if row_data['map_display_name'] else row_data['map_uid'],
+            format_time_ms(row_data['time_ms']),
+            format_iso_timestamp_short(row_data['game_timestamp'])
+        ) for row_idx, row_data in enumerate(new_players_rows)]
+        tv_insert = tv_new_players.insert
+        for row_idx, (row_data, values) in enumerate(zip(new_players_rows, new_players_values)):
+            iid = tv_insert("", "end", values=values, tags=NEW_PLAYER_STRIPES[row_idx & 1])
+            new_players_sort_keys[iid] = {'time': row_data['time_ms']}
+            new_players_extra_tags[iid] = ('new_player_highlight',)
+
+    def on_close(self):
+        self._refresh_pool.shutdown(wait=True) # No worker may still be using its connection below
+        for conn in _refresh_conns:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+        _refresh_conns.clear()
+        try:
+            self.db.close()
+        except sqlite3.Error:
+            pass
+        self.root.destroy()
 
 
 if __name__ == '__main__':